@@ -1,19 +1,60 @@
 import pandas as pd
 import numpy as np
 import argparse
-import random
 import time
 import os
+import hashlib
+import zipfile
+from collections import OrderedDict
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from numba import njit, prange
+    TEM_NUMBA = True
+except ImportError:  # sem numba as rotinas abaixo rodam em Python puro (mesmo resultado, mais lentas)
+    TEM_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+# Tipos estreitos para as colunas do CSV (metade da memória dos padrões int64/float64).
+# val_ore fica em float64 para não perder precisão nos valores monetários.
+DTYPES_CSV = {"id": "int32", "x": "float32", "y": "float32", "z": "float32",
+              "tonn": "float32", "val_ore": "float64", "dest": "int8"}
+
+# Cache da instância já processada (<csv>.npz); mude a versão se o conteúdo salvo mudar
+VERSAO_CACHE = 1
+COLUNAS_CACHE = ["id", "x", "y", "z", "tonn", "val_ore", "dest"]
+VETORES_CACHE = ["preds_indptr", "preds_idx", "succs_indptr", "succs_idx"]
 
 # Classe MineLibCPIT: gerencia leitura de dados e estruturação
 
 class MineLibCPIT:
 
-    def __init__(self, arquivo_csv: str):
+    def __init__(self, arquivo_csv: str, usar_cache=True):
         self.arquivo_csv = arquivo_csv
-        self.df = pd.read_csv(arquivo_csv)
+        self.arquivo_cache = arquivo_csv + ".npz"
+        if usar_cache and self._carregar_cache():
+            return
+        self.df = self._ler_csv(arquivo_csv)
         self._validar_colunas()
         self._preparar_dados()
+        if usar_cache:
+            self._salvar_cache()
+
+    def _ler_csv(self, arquivo_csv):
+        # Lê só as colunas usadas, já com tipos estreitos; engine pyarrow quando disponível
+        colunas = pd.read_csv(arquivo_csv, nrows=0).columns
+        usar = [c for c in colunas if c in DTYPES_CSV or c == "precedentes"]
+        dtypes = {c: t for c, t in DTYPES_CSV.items() if c in usar}
+        try:
+            return pd.read_csv(arquivo_csv, engine="pyarrow", usecols=usar, dtype=dtypes)
+        except ImportError:  # pyarrow não instalado
+            return pd.read_csv(arquivo_csv, usecols=usar, dtype=dtypes)
 
     def _validar_colunas(self):
         colunas_necessarias = {"id", "x", "y", "z", "tonn", "dest", "val_ore", "precedentes"}
@@ -28,150 +69,484 @@ class MineLibCPIT:
             raise ValueError(f"Arquivo CSV faltando colunas: {faltando}")
 
     def _preparar_dados(self):
-        #fallback automatico
-        self.ids = list(self.df["id"])
-        self.tonn_dict = dict(zip(self.df["id"], self.df["tonn"]))
-        self.dest_dict = dict(zip(self.df["id"], self.df["dest"]))
-        self.val_ore_dict = dict(zip(self.df["id"], self.df["val_ore"]))
-        self.preds_dict = {row.id: eval(row.precedentes) if isinstance(row.precedentes, str) else row.precedentes
-                           for _, row in self.df.iterrows()}
-        self.succs_dict = self._calcular_sucessores()
+        #fallback automatico (antes de montar dicionários e vetores)
         self.df["tonn"] = self.df.get("tonn", 100)
         self.df["val_ore"] = self.df.get("val_ore", (self.df["z"].max() - self.df["z"]) * 10)
         self.df["dest"] = self.df.get("dest", 1)
+        self._montar_vetores()
+
+        # Precedências em formato CSR: predecessores de b = preds_idx[preds_indptr[b]:preds_indptr[b+1]]
+        # A coluna "precedentes" ("[id1,id2,...]") é lida de uma vez, sem eval por linha
+        texto = self.df["precedentes"].fillna("").astype(str).str.strip().str.strip("[]").str.strip(" ,")
+        vazio = (texto == "").to_numpy()
+        tamanhos = np.where(vazio, 0, texto.str.count(",").to_numpy() + 1).astype(np.int32)
+        plano = texto[~vazio].str.cat(sep=",")
+        preds_ids = np.fromstring(plano, dtype=np.int64, sep=",") if plano else np.empty(0, np.int64)
+        self.preds_indptr = np.concatenate(([0], np.cumsum(tamanhos))).astype(np.int32)
+        if preds_ids.size != self.preds_indptr[-1]:  # o CSR desalinhado faria as rotinas numba lerem fora do vetor
+            raise ValueError(f"Coluna 'precedentes' malformada: {preds_ids.size} ids lidos, "
+                             f"{self.preds_indptr[-1]} esperados pela contagem de vírgulas")
+        self.preds_idx = self._ids_para_idx(preds_ids)
+        self.succs_indptr, self.succs_idx = self._calcular_sucessores()
+        self._validar_aciclico()
+
+    def _validar_aciclico(self):
+        # Ciclo (ou autorreferência) nas precedências: nenhuma ordem factível existe e a pilha de
+        # _reparar cresceria sem limite (numba não checa limites)
+        if _contar_kahn(self.preds_indptr, self.succs_indptr, self.succs_idx) != self.n_blocos:
+            raise ValueError("Precedências com ciclo: não existe ordem de lavra factível")
+
+    def _montar_vetores(self):
+        self.ids = list(self.df["id"])
+
+        # Vetores indexados pela posição do bloco no df (índice 0..n-1).
+        # As soluções do solver são vetores int32 desses índices; use ids[idx] para voltar ao id.
+        self.n_blocos = len(self.ids)
+        self.tonn_arr = self.df["tonn"].to_numpy(np.float32)
+        self.val_ore_arr = self.df["val_ore"].to_numpy(np.float64)
+        self.dest_arr = self.df["dest"].to_numpy(np.int8)
+
+    def _carregar_cache(self):
+        # Usa o .npz de uma execução anterior se ele for mais novo que o CSV.
+        # O df reconstruído tem as colunas numéricas; as precedências ficam só no CSR.
+        if not (os.path.exists(self.arquivo_cache)
+                and os.path.getmtime(self.arquivo_cache) >= os.path.getmtime(self.arquivo_csv)):
+            return False
+        try:
+            with np.load(self.arquivo_cache) as dados:
+                if int(dados["versao"]) != VERSAO_CACHE:
+                    return False
+                colunas = {c: dados[c] for c in COLUNAS_CACHE}
+                vetores = {nome: dados[nome] for nome in VETORES_CACHE}
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):  # cache ilegível ou incompleto: relê o CSV
+            return False
+        if not self._cache_consistente(colunas, vetores):
+            return False
+        self.df = pd.DataFrame(colunas)
+        for nome, vetor in vetores.items():
+            setattr(self, nome, vetor)
+        self._montar_vetores()
+        return True
+
+    @staticmethod
+    def _cache_consistente(colunas, vetores):
+        # Formatos coerentes antes de entregar o CSR às rotinas numba (que não checam limites)
+        n = len(colunas["id"])
+        if any(len(v) != n for v in colunas.values()):
+            return False
+        for prefixo in ("preds", "succs"):
+            indptr, idx = vetores[f"{prefixo}_indptr"], vetores[f"{prefixo}_idx"]
+            if indptr.size != n + 1 or indptr[0] != 0 or indptr[-1] != idx.size or (np.diff(indptr) < 0).any():
+                return False
+            if idx.size and (idx.min() < 0 or idx.max() >= n):
+                return False
+        return True
 
+    def _salvar_cache(self):
+        dados = {c: self.df[c].to_numpy() for c in COLUNAS_CACHE}
+        dados.update({nome: getattr(self, nome) for nome in VETORES_CACHE})
+        temporario = self.arquivo_cache + ".tmp"
+        try:
+            with open(temporario, "wb") as f:
+                np.savez(f, versao=VERSAO_CACHE, **dados)
+            os.replace(temporario, self.arquivo_cache)
+        except OSError:  # diretório sem permissão de escrita: segue sem cache
+            pass
+
+
+    def _ids_para_idx(self, ids_busca):
+        # Converte ids de blocos em índices (posição no df) por busca binária
+        ids = np.asarray(self.ids)
+        ordem = np.argsort(ids, kind="stable")
+        pos = np.minimum(np.searchsorted(ids, ids_busca, sorter=ordem), len(ids) - 1)
+        idx = ordem[pos]
+        desconhecidos = ids[idx] != ids_busca
+        if desconhecidos.any():
+            raise ValueError(f"Precedentes com ids inexistentes: {set(ids_busca[desconhecidos].tolist())}")
+        return idx.astype(np.int32)
 
     def _calcular_sucessores(self):
-        succs = {b: [] for b in self.ids}
-        for b, preds in self.preds_dict.items():
-            for p in preds:
-                succs[p].append(b)
-        return succs
+        # Bucket sort sobre preds_idx: conta os sucessores de cada bloco e espalha as arestas com um
+        # argsort estável (cada balde fica com os sucessores em ordem crescente de índice)
+        contagem = np.bincount(self.preds_idx, minlength=self.n_blocos)
+        succs_indptr = np.concatenate(([0], np.cumsum(contagem))).astype(np.int32)
+        origem = np.repeat(np.arange(self.n_blocos, dtype=np.int32), np.diff(self.preds_indptr))
+        succs_idx = origem[np.argsort(self.preds_idx, kind="stable")]
+        return succs_indptr, succs_idx
+
+    # Compatibilidade: dicionários por id montados no primeiro acesso (df e CSR) e memorizados
+
+    @cached_property
+    def tonn_dict(self):
+        return dict(zip(self.df["id"], self.df["tonn"]))
+
+    @cached_property
+    def dest_dict(self):
+        return dict(zip(self.df["id"], self.df["dest"]))
+
+    @cached_property
+    def val_ore_dict(self):
+        return dict(zip(self.df["id"], self.df["val_ore"]))
+
+    def _csr_para_dict(self, indptr, idx):
+        ids = np.asarray(self.ids)
+        return {b: ids[idx[indptr[i]:indptr[i + 1]]].tolist() for i, b in enumerate(self.ids)}
+
+    @cached_property
+    def preds_dict(self):
+        return self._csr_para_dict(self.preds_indptr, self.preds_idx)
+
+    @cached_property
+    def succs_dict(self):
+        return self._csr_para_dict(self.succs_indptr, self.succs_idx)
+
+
+# Rotinas compiladas (numba) de verificação e reparo sobre as precedências em CSR
+
+@njit(cache=True)
+def _contar_kahn(preds_indptr, succs_indptr, succs_idx):
+    # Quantos blocos o algoritmo de Kahn consegue ordenar (menos que n_blocos se houver ciclo)
+    grau = np.diff(preds_indptr)
+    fila = np.empty(grau.size, np.int64)
+    fim = 0
+    for b in range(grau.size):
+        if grau[b] == 0:
+            fila[fim] = b
+            fim += 1
+    ini = 0
+    while ini < fim:
+        b = fila[ini]
+        ini += 1
+        for k in range(succs_indptr[b], succs_indptr[b + 1]):
+            s = succs_idx[k]
+            grau[s] -= 1
+            if grau[s] == 0:
+                fila[fim] = s
+                fim += 1
+    return ini
+
+
+# Os blocos visitados são marcados com um carimbo de versão: marcas[b] == versao indica visitado,
+# então cada chamada começa com tudo "limpo" só trocando a versão (sem zerar o vetor).
+
+@njit(cache=True)
+def _verificar(sol, preds_indptr, preds_idx, marcas, versao):
+    for b in sol:
+        for k in range(preds_indptr[b], preds_indptr[b + 1]):
+            if marcas[preds_idx[k]] != versao:
+                return False
+        marcas[b] = versao
+    return True
+
+
+@njit(cache=True)
+def _reparar(sol, preds_indptr, preds_idx, marcas, versao, pilha, saida):
+    # Escreve em saida a solução reparada (predecessores antecipados em fecho transitivo)
+    # e retorna seu tamanho. pilha precisa de len(preds_idx) + 1 posições.
+    n = 0
+    for b in sol:
+        topo = 1
+        pilha[0] = b
+        while topo > 0:
+            x = pilha[topo - 1]
+            if marcas[x] == versao:
+                topo -= 1
+                continue
+            empilhou = False
+            for k in range(preds_indptr[x + 1] - 1, preds_indptr[x] - 1, -1):
+                p = preds_idx[k]
+                if marcas[p] != versao:
+                    pilha[topo] = p
+                    topo += 1
+                    empilhou = True
+            if not empilhou:
+                topo -= 1
+                saida[n] = x
+                n += 1
+                marcas[x] = versao
+    return n
+
+
+@njit(cache=True)
+def _ppx(pai1, pai2, escolha, marcas, versao, out):
+    # Precedence Preservative Crossover: a posição k recebe o primeiro bloco ainda não usado do pai
+    # sorteado em escolha[k]. Os anteriores a ele nesse pai (incluindo seus predecessores) já foram
+    # usados, então o filho é factível sempre que os dois pais forem.
+    i1 = 0
+    i2 = 0
+    for k in range(out.size):
+        if escolha[k]:
+            while marcas[pai2[i2]] == versao:
+                i2 += 1
+            b = pai2[i2]
+        else:
+            while marcas[pai1[i1]] == versao:
+                i1 += 1
+            b = pai1[i1]
+        out[k] = b
+        marcas[b] = versao
+
+
+# Avaliação vetorizada do VPL (usada pelo solver e pelos processos do pool)
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _vpl_kernel(pop, tonn, val_ore, dest, desconto, capacidade):
+    # Uma passada por linha, em paralelo entre as linhas, sem matrizes temporárias
+    s, k = pop.shape
+    out = np.empty(s)
+    for i in prange(s):
+        acc = 0.0
+        ton_minerio = 0.0
+        for j in range(k):
+            b = pop[i, j]
+            t = tonn[b]
+            if dest[b] == 1:
+                cash = val_ore[b] - 0.75 * t
+                ton_minerio += t
+            else:
+                cash = -0.75 * t
+            acc += cash * desconto[min(int(ton_minerio // capacidade), desconto.size - 1)]
+        out[i] = acc
+    return out
+
+
+def _vpl_populacao(pop, tonn, val_ore, dest, taxa_desconto, capacidade):
+    # pop: matriz int32 (pop_size x n_blocos), uma solução por linha; retorna o VPL de cada linha
+    # Desconto compatível com baseline (ano-1, com ano começando em 0 aqui); cobre toda a tonelagem de minério
+    n_anos = int(tonn[dest == 1].sum(dtype=np.float64) // capacidade) + 2
+    desconto = (1 + taxa_desconto) ** -np.arange(n_anos, dtype=np.float64)
+    if TEM_NUMBA:
+        return _vpl_kernel(pop, tonn, val_ore, dest, desconto, capacidade)
+
+    # Sem numba: mesma conta vetorizada em NumPy (com matrizes temporárias pop_size x n_blocos)
+    ton = tonn[pop]
+    val = val_ore[pop]
+    minerio = dest[pop] == 1
+
+    # Cálculo de valor líquido compatível com baseline:
+    # minério -> -0.75 * tonn + val_ore (assumindo val_ore = process_profit); estéril -> -0.75 * tonn
+    cash = np.where(minerio, val - 0.75 * ton, -0.75 * ton)
+
+    # Ano de cada bloco pela tonelagem acumulada de minério (capacidade só consome minério)
+    ton_minerio = np.where(minerio, ton, 0.0)
+    ano = (np.cumsum(ton_minerio, axis=1, dtype=np.float64) // capacidade).astype(np.int64)
+    return (cash * desconto[np.minimum(ano, n_anos - 1)]).sum(axis=1)
+
+
+# Vetores da instância em cada processo do pool: enviados uma vez pelo initializer
+_dados_worker = {}
+
+
+def _init_worker(tonn, val_ore, dest):
+    _dados_worker.update(tonn=tonn, val_ore=val_ore, dest=dest)
+
+
+def _vpl_worker(args):
+    pop, taxa_desconto, capacidade = args
+    return _vpl_populacao(pop, _dados_worker["tonn"], _dados_worker["val_ore"], _dados_worker["dest"],
+                          taxa_desconto, capacidade)
 
 
 # Classe CPITSolverCompleto: heurísticas, GA e baseline
 
 class CPITSolverCompleto:
-    def __init__(self, instancia: MineLibCPIT, pop_size=50, num_geracoes=50, taxa_mutacao=0.05, seed=42):
-        random.seed(seed)
-        np.random.seed(seed)
+    def __init__(self, instancia: MineLibCPIT, pop_size=50, num_geracoes=50, taxa_mutacao=0.05, seed=42,
+                 n_workers=1, tam_cache=4096, n_elite=2, k_torneio=2, tipo_crossover="ox"):
+        # gerador único (PCG64) para todo o sorteio do solver: vetores inteiros numa só chamada
+        self.rng = np.random.default_rng(seed)
         self.inst = instancia
         self.pop_size = pop_size
         self.num_geracoes = num_geracoes
         self.taxa_mutacao = taxa_mutacao
+        self.n_elite = max(0, min(n_elite, pop_size))
+        if k_torneio < 1:
+            raise ValueError(f"k_torneio deve ser >= 1 (recebido {k_torneio})")
+        self.k_torneio = k_torneio
+        self.tipo_crossover = tipo_crossover
         self.melhor_solucao = None
         self.melhor_vpl = -np.inf
         self.historico = []
+        # buffers reutilizados pelas rotinas compiladas de reparo
+        self._pilha = np.empty(self.inst.preds_idx.size + 1, dtype=np.int32)
+        self._saida_reparo = np.empty(self.inst.n_blocos, dtype=np.int32)
+        self._visitados = np.zeros(self.inst.n_blocos, dtype=np.int32)
+        self._versao = 0
+        self._dentro_fatia = np.zeros(self.inst.n_blocos, dtype=np.uint8)
+        # população em buffer duplo: a geração atual lê de um e escreve os filhos no outro
+        self._pop_a = np.empty((pop_size, self.inst.n_blocos), dtype=np.int32)
+        self._pop_b = np.empty_like(self._pop_a)
+        # cache LRU de VPL por solução (chave: hash do vetor), evita reavaliar filhos repetidos
+        self._cache_vpl = OrderedDict()
+        self._tam_cache = tam_cache
+        # pool de processos para o fitness, opcional (serial em populações pequenas ou com 1 worker)
+        self._n_workers = min(n_workers, pop_size)
+        self._pool = None
+        # com numba o _vpl_kernel já paraleliza com prange: o pool fica só para o fallback em NumPy
+        # (misturar os threads do numba com processos do pool trava o interpretador na saída)
+        if not TEM_NUMBA and pop_size > 4 and self._n_workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._n_workers, initializer=_init_worker,
+                initargs=(self.inst.tonn_arr, self.inst.val_ore_arr, self.inst.dest_arr))
+
+    def __del__(self):
+        if getattr(self, "_pool", None) is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
 
     # ----------------- Avaliação de soluções -----------------
 
     def calcular_vpl(self, solucao, taxa_desconto=0.15, capacidade=10_000_000):
-        ano = 1
-        ton_acumulada = 0.0
-        valor_total = 0.0
-        visitados = set()
-
-        for b in solucao:
-            preds = self.inst.preds_dict[b]
-            if all(p in visitados for p in preds):
-                dest = self.inst.dest_dict[b]
-                ton = float(self.inst.tonn_dict[b])
-                val = float(self.inst.val_ore_dict[b])
-
-                # Cálculo de valor líquido compatível com baseline
-                if dest == 1:  # minério
-                    # -0.75 * tonn + val_ore (assumindo val_ore = process_profit)
-                    cash = -0.75 * ton + val
-                    if ton_acumulada + ton > capacidade:
-                        ano += 1
-                        ton_acumulada = 0
-                    ton_acumulada += ton
-                else:  # estéril
-                    cash = -0.75 * ton  # sem process profit
-
-                # Desconto compatível com baseline (ano-1)
-                valor_total += cash / ((1 + taxa_desconto) ** (ano - 1))
-                visitados.add(b)
-
-        return valor_total
+        # solucao: vetor int32 de índices; a factibilidade é garantida por reparar_solucao
+        return float(self.calcular_vpl_populacao(solucao[np.newaxis, :], taxa_desconto, capacidade)[0])
+
+    def calcular_vpl_populacao(self, pop, taxa_desconto=0.15, capacidade=10_000_000):
+        # Delega a _vpl_populacao com os vetores da instância
+        return _vpl_populacao(pop, self.inst.tonn_arr, self.inst.val_ore_arr, self.inst.dest_arr,
+                              taxa_desconto, capacidade)
+
+    def avaliar_populacao(self, pop, taxa_desconto=0.15, capacidade=10_000_000):
+        # Divide a população em blocos de linhas entre os processos do pool, quando houver
+        if self._pool is None:
+            return self.calcular_vpl_populacao(pop, taxa_desconto, capacidade)
+        partes = [(parte, taxa_desconto, capacidade) for parte in np.array_split(pop, self._n_workers)]
+        return np.concatenate(list(self._pool.map(_vpl_worker, partes)))
+
+    def avaliar_populacao_cache(self, pop):
+        # Avalia (em lote) só as soluções ainda fora do cache; as demais vêm do cache LRU
+        chaves = [hashlib.blake2b(sol.tobytes(), digest_size=16).digest() for sol in pop]
+        faltando = [i for i, c in enumerate(chaves) if c not in self._cache_vpl]
+        if faltando:
+            for i, v in zip(faltando, self.avaliar_populacao(pop[faltando])):
+                self._cache_vpl[chaves[i]] = v
+        fitness = np.empty(len(chaves))
+        for i, c in enumerate(chaves):
+            self._cache_vpl.move_to_end(c)
+            fitness[i] = self._cache_vpl[c]
+        while len(self._cache_vpl) > self._tam_cache:
+            self._cache_vpl.popitem(last=False)
+        return fitness
 
 
     # ----------------- Verificação e reparo ------------------
 
-    def verificar_factibilidade(self, solucao):
-        visitados = set()
-        for b in solucao:
-            if any(pred not in visitados for pred in self.inst.preds_dict[b]):
-                return False
-            visitados.add(b)
-        return True
+    def _nova_versao(self):
+        # "Limpa" o vetor de visitados em O(1); só zera de fato quando o contador estoura
+        self._versao += 1
+        if self._versao == np.iinfo(np.int32).max:
+            self._visitados.fill(0)
+            self._versao = 1
+        return self._versao
 
-    def reparar_solucao(self, solucao):
-        solucao_corrigida = []
-        visitados = set()
-        for b in solucao:
-            preds = self.inst.preds_dict[b]
-            for p in preds:
-                if p not in visitados:
-                    solucao_corrigida.append(p)
-                    visitados.add(p)
-            if b not in visitados:
-                solucao_corrigida.append(b)
-                visitados.add(b)
-        return solucao_corrigida
+    def verificar_factibilidade(self, solucao):
+        return _verificar(solucao, self.inst.preds_indptr, self.inst.preds_idx, self._visitados,
+                          self._nova_versao())
+
+    def reparar_solucao(self, solucao, out=None):
+        # Devolve a própria ordem quando a solução já é factível, então dispensa verificar antes.
+        # out: vetor de destino opcional (pode ser a própria solucao), evita alocar a saída
+        n = _reparar(solucao, self.inst.preds_indptr, self.inst.preds_idx, self._visitados,
+                     self._nova_versao(), self._pilha, self._saida_reparo)
+        if out is None:
+            return self._saida_reparo[:n].copy()
+        out[:] = self._saida_reparo[:n]
+        return out
 
     # ----------------- População inicial ---------------------
 
     def gerar_solucao_aleatoria(self):
-        solucao = self.inst.ids.copy()
-        random.shuffle(solucao)
-        if not self.verificar_factibilidade(solucao):
-            solucao = self.reparar_solucao(solucao)
-        return solucao
+        solucao = self.rng.permutation(self.inst.n_blocos).astype(np.int32)
+        return self.reparar_solucao(solucao, out=solucao)
 
     def gerar_populacao_inicial(self):
-        return [self.gerar_solucao_aleatoria() for _ in range(self.pop_size)]
+        # todas as permutações de uma vez; depois repara cada linha
+        self._pop_a[:] = np.arange(self.inst.n_blocos, dtype=np.int32)
+        self.rng.permuted(self._pop_a, axis=1, out=self._pop_a)
+        for sol in self._pop_a:
+            self.reparar_solucao(sol, out=sol)
+        return self._pop_a
 
     # ----------------- Operadores genéticos ------------------
 
-    def crossover(self, pai1, pai2):
+    def crossover(self, pai1, pai2, out=None):
+        # Order crossover: mantém pai1[a:b] e completa com os blocos de pai2 fora do trecho,
+        # na ordem de pai2 (pertinência pelo bitmap dentro_fatia, O(n)). Escreve o filho em out.
         n = len(pai1)
-        a, b = sorted(random.sample(range(n), 2))
-        filho = pai1[a:b] + [x for x in pai2 if x not in pai1[a:b]]
-        if not self.verificar_factibilidade(filho):
-            filho = self.reparar_solucao(filho)
-        return filho
-
-    def mutacao(self, solucao):
-        sol = solucao.copy()
-        if random.random() < self.taxa_mutacao:
-            i, j = random.sample(range(len(sol)), 2)
-            sol[i], sol[j] = sol[j], sol[i]
-            if not self.verificar_factibilidade(sol):
-                sol = self.reparar_solucao(sol)
-        return sol
+        if out is None:
+            out = np.empty(n, dtype=np.int32)
+        a, b = np.sort(self.rng.integers(0, n, size=2))
+        fatia = pai1[a:b]
+        # bitmap reaproveitado entre chamadas: marca só o trecho e o desmarca ao final (O(b - a))
+        dentro_fatia = self._dentro_fatia
+        dentro_fatia[fatia] = 1
+        out[:b - a] = fatia
+        out[b - a:] = pai2[dentro_fatia[pai2] == 0]
+        dentro_fatia[fatia] = 0
+        return self.reparar_solucao(out, out=out)
+
+    def crossover_ppx(self, pai1, pai2, out=None):
+        # Precedence Preservative Crossover: com pais factíveis o filho já sai factível, sem reparo
+        if out is None:
+            out = np.empty(len(pai1), dtype=np.int32)
+        escolha = self.rng.integers(0, 2, size=len(pai1), dtype=np.uint8)
+        _ppx(pai1, pai2, escolha, self._visitados, self._nova_versao(), out)
+        return out
+
+    def crossover_lote(self, pop, idx_pai1, idx_pai2, out):
+        # Gera len(idx_pai1) filhos, escrevendo cada um na linha correspondente de out
+        operador = self.crossover_ppx if self.tipo_crossover == "ppx" else self.crossover
+        for r, (i, j) in enumerate(zip(idx_pai1, idx_pai2)):
+            operador(pop[i], pop[j], out[r])
+        return out
+
+    def mutacao_populacao(self, pop):
+        # Cada indivíduo sofre mutação com prob. taxa_mutacao: sorteia de uma vez quantos (binomial)
+        # e quais, e troca um par de posições em cada um (in place na matriz da população)
+        k = self.rng.binomial(len(pop), self.taxa_mutacao)
+        if k == 0:
+            return pop
+        quem = self.rng.choice(len(pop), k, replace=False)
+        pares = self.rng.integers(0, pop.shape[1], size=(k, 2))
+        i, j = pares[:, 0], pares[:, 1]
+        pop[quem, i], pop[quem, j] = pop[quem, j], pop[quem, i]
+        for r in quem:
+            self.reparar_solucao(pop[r], out=pop[r])
+        return pop
+
+    def selecao_torneio(self, fitness, n):
+        # n pares de pais de uma vez: cada pai é o melhor de k_torneio indivíduos sorteados
+        torneio = self.rng.integers(0, len(fitness), size=(2, n, self.k_torneio))
+        vencedor = fitness[torneio].argmax(axis=2)
+        pais = np.take_along_axis(torneio, vencedor[..., np.newaxis], axis=2)[..., 0]
+        return pais[0], pais[1]
 
     # ----------------- Algoritmo Genético --------------------
 
     def executar(self):
-        pop = self.gerar_populacao_inicial()
-        fitness = [self.calcular_vpl(sol) for sol in pop]
-        self.melhor_solucao = pop[np.argmax(fitness)]
-        self.melhor_vpl = max(fitness)
+        self._cache_vpl.clear()
+        pop, nova_pop = self.gerar_populacao_inicial(), self._pop_b
+        fitness = self.avaliar_populacao_cache(pop)
+        idx = int(fitness.argmax())
+        self.melhor_solucao = pop[idx].copy()
+        self.melhor_vpl = fitness[idx]
+        e = self.n_elite
 
         for g in range(self.num_geracoes):
-            nova_pop = []
-            while len(nova_pop) < self.pop_size:
-                pais = random.sample(pop, 2)
-                filho = self.crossover(pais[0], pais[1])
-                filho = self.mutacao(filho)
-                nova_pop.append(filho)
-
-            fitness = [self.calcular_vpl(sol) for sol in nova_pop]
-            melhor_gen = max(fitness)
+            # elitismo: os e melhores passam intactos (argpartition, O(pop_size)); o resto vem do crossover
+            if e:
+                nova_pop[:e] = pop[np.argpartition(fitness, -e)[-e:]]
+            if e < self.pop_size:
+                pais1, pais2 = self.selecao_torneio(fitness, self.pop_size - e)
+                self.crossover_lote(pop, pais1, pais2, nova_pop[e:])
+                self.mutacao_populacao(nova_pop[e:])
+
+            fitness = self.avaliar_populacao_cache(nova_pop)
+            idx = int(fitness.argmax())
+            melhor_gen = fitness[idx]
             if melhor_gen > self.melhor_vpl:
                 self.melhor_vpl = melhor_gen
-                self.melhor_solucao = nova_pop[np.argmax(fitness)]
+                self.melhor_solucao = nova_pop[idx].copy()
+
+            # os filhos viram a população da próxima geração; o buffer antigo recebe os próximos filhos
+            pop, nova_pop = nova_pop, pop
 
             self.historico.append(self.melhor_vpl)
             print(f"Geração {g+1}/{self.num_geracoes} — Melhor VPL: {self.melhor_vpl:.2f}")
@@ -181,18 +556,24 @@ class CPITSolverCompleto:
     # ----------------- Baseline TopoSort ---------------------
 
     def baseline_toposort(self):
-        visitados = set()
-        ordem = []
-        preds_restantes = {b: set(self.inst.preds_dict[b]) for b in self.inst.ids}
-        while len(ordem) < len(self.inst.ids):
-            livres = [b for b, preds in preds_restantes.items() if not preds and b not in visitados]
-            if not livres:
-                break
-            b = random.choice(livres)
-            ordem.append(b)
-            visitados.add(b)
-            for s in self.inst.succs_dict[b]:
-                preds_restantes[s].discard(b)
+        # Kahn: grau de entrada por bloco; os blocos livres ficam numa lista da qual se sorteia
+        # o próximo (remoção por troca com o último, O(1)). Total O(V + E).
+        sp, si = self.inst.succs_indptr, self.inst.succs_idx
+        grau = np.diff(self.inst.preds_indptr).astype(np.int32)
+        livres = np.flatnonzero(grau == 0).tolist()
+        ordem = np.empty(self.inst.n_blocos, dtype=np.int32)
+        n = 0
+        while livres:
+            j = int(self.rng.integers(len(livres)))
+            livres[j], livres[-1] = livres[-1], livres[j]
+            b = livres.pop()
+            ordem[n] = b
+            n += 1
+            for s in si[sp[b]:sp[b + 1]].tolist():
+                grau[s] -= 1
+                if grau[s] == 0:
+                    livres.append(s)
+        ordem = ordem[:n]
         return ordem, self.calcular_vpl(ordem)
 
 
@@ -207,7 +588,15 @@ def main():
     parser.add_argument("--geracoes", type=int, default=50, help="Número de gerações.")
     parser.add_argument("--mutacao", type=float, default=0.05, help="Taxa de mutação.")
     parser.add_argument("--seed", type=int, default=42, help="Semente aleatória.")
+    parser.add_argument("--elite", type=int, default=2, help="Indivíduos mantidos intactos a cada geração.")
+    parser.add_argument("--torneio", type=int, default=2, help="Tamanho do torneio na seleção de pais.")
+    parser.add_argument("--crossover", choices=["ox", "ppx"], default="ox",
+                        help="Operador de crossover: ox (order + reparo) ou ppx (preserva precedências).")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos para avaliar o fitness sem numba (com numba o cálculo já é paralelo).")
     args = parser.parse_args()
+    if args.torneio < 1:
+        parser.error("--torneio deve ser >= 1")
 
     inicio = time.time()
     print(f"\nCarregando instância: {args.instancia}")
@@ -219,7 +608,9 @@ def main():
     print(f"Baseline TopoSort VPL = {base_vpl:.2f}")
 
     print("\nExecutando Algoritmo Genético...")
-    solver = CPITSolverCompleto(instancia, args.pop, args.geracoes, args.mutacao, args.seed)
+    solver = CPITSolverCompleto(instancia, args.pop, args.geracoes, args.mutacao, args.seed, args.workers,
+                                n_elite=args.elite, k_torneio=args.torneio,
+                                tipo_crossover=args.crossover)
     sol, vpl = solver.executar()
 
     tempo = time.time() - inicio
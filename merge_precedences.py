@@ -1,4 +1,5 @@
 # merge_precedences.py — mescla arquivo base de blocos com arquivo de precedências (prec1..precN)
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -48,32 +49,30 @@ def merge_precedences(modelo_blocos_path, precedencias_path, output_path):
             prec_cols = []
 
     # Montar coluna 'precedentes' no formato string de lista Python: "[0,1,2]"
-    def make_preced_list(row):
-        if 'precedentes' in row and pd.notna(row['precedentes']) and str(row['precedentes']).strip() != "":
-            # já existe algo — tentar converter "0;1" ou "0,1" em lista string "[0,1]"
-            s = str(row['precedentes']).strip()
-            s = s.replace(';', ',')
-            parts = [p.strip() for p in s.split(',') if p.strip() != ""]
-            nums = [int(p) for p in parts if p.replace('-', '').isdigit()]
-            return "[" + ",".join(map(str, nums)) + "]"
-        elif prec_cols:
-            vals = []
-            for c in prec_cols:
-                v = row.get(c, None)
-                if pd.isna(v):
-                    continue
-                try:
-                    iv = int(v)
-                except Exception:
-                    continue
-                if iv != -1:
-                    vals.append(iv)
-            return "[" + ",".join(map(str, vals)) + "]" if vals else "[]"
-        else:
-            return "[]"
+    def normalizar_precedentes(s):
+        # já existe algo — tentar converter "0;1" ou "0,1" em lista string "[0,1]"
+        s = str(s).strip()
+        s = s.replace(';', ',')
+        parts = [p.strip() for p in s.split(',') if p.strip() != ""]
+        nums = [int(p) for p in parts if p.replace('-', '').isdigit()]
+        return "[" + ",".join(map(str, nums)) + "]"
+
+    if prec_cols:
+        # Matriz de ids (linhas x prec*): valores vazios, não numéricos ou -1 = sem predecessor
+        M = df_precedencias[prec_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64')
+        M = np.where(np.isfinite(M), M, -1).astype(np.int64)
+        valido = M != -1
+        listas = ["[" + ",".join(map(str, row[v].tolist())) + "]" for row, v in zip(M, valido)]
+        precedentes = pd.Series(listas, index=df_precedencias.index)
+    else:
+        precedentes = pd.Series("[]", index=df_precedencias.index)
 
-    # Aplicar criação
-    df_precedencias['precedentes'] = df_precedencias.apply(make_preced_list, axis=1)
+    # Aplicar criação (a coluna 'precedentes' original, quando preenchida, tem prioridade)
+    if 'precedentes' in df_precedencias.columns:
+        texto = df_precedencias['precedentes']
+        preenchido = texto.notna() & (texto.astype(str).str.strip() != "")
+        precedentes[preenchido] = texto[preenchido].map(normalizar_precedentes)
+    df_precedencias['precedentes'] = precedentes
 
     # Merge pelo id (left join)
     merged = pd.merge(df_blocos, df_precedencias[['id', 'precedentes']], on='id', how='left')